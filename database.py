@@ -4,22 +4,89 @@ Handles all database operations and connections
 """
 
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
 # Database configuration
 DATABASE = 'library.db'
 
+# Short-TTL cache of per-patron active borrow counts. Entries are dropped
+# whenever a write changes that patron's loans, so the TTL only bounds
+# staleness against out-of-band writes.
+_BORROW_COUNT_TTL = 1.0  # seconds
+_borrow_count_cache: Dict[str, Tuple[int, float]] = {}
+
+# Monotonic counter bumped on every loan-table write; read-side caches key
+# their entries on it so any write invalidates them implicitly
+_loan_state_version = 0
+
+
+def loan_state_version() -> int:
+    """Current version of the loan state; changes after every loan write."""
+    return _loan_state_version
+
+
+def invalidate_patron_loans(patron_id: str) -> None:
+    """Invalidate cached loan-derived data after a write for this patron."""
+    global _loan_state_version
+    _loan_state_version += 1
+    _borrow_count_cache.pop(patron_id, None)
+
+# Thread-local storage for the cached helper connection
+_local = threading.local()
+
+@lru_cache(maxsize=4096)
+def parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO-format timestamp, memoizing repeated values.
+
+    Borrow/due dates recur across rows for patrons with long histories, so
+    caching avoids re-parsing identical strings on every query.
+    """
+    return datetime.fromisoformat(value)
+
 def get_db_connection():
     """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
+    # URI form supports e.g. shared in-memory databases in tests; the larger
+    # statement cache keeps hot queries compiled across calls
+    conn = sqlite3.connect(DATABASE, uri=DATABASE.startswith('file:'),
+                           cached_statements=256)
     conn.row_factory = sqlite3.Row  # This enables column access by name
     return conn
 
+def _cached_connection() -> sqlite3.Connection:
+    """Get the thread-local connection shared by the helper functions.
+
+    Reusing one connection per thread keeps SQLite's per-connection
+    prepared-statement cache warm and skips the connect/teardown syscalls
+    that opening a fresh connection per helper call would pay. The
+    connection is replaced if DATABASE has been repointed (e.g. by tests).
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and getattr(_local, 'database', None) == DATABASE:
+        return conn
+    if conn is not None:
+        conn.close()
+    conn = sqlite3.connect(DATABASE, uri=DATABASE.startswith('file:'),
+                           cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # Fast-commit settings; the persistent WAL journal mode is set at init
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA cache_size=-20000')
+    _local.conn = conn
+    _local.database = DATABASE
+    return conn
+
 def init_database():
     """Initialize the database with required tables."""
     conn = get_db_connection()
-    
+
+    # Write-ahead logging commits with a single sequential append instead of
+    # rewriting pages through a rollback journal (persistent setting)
+    conn.execute('PRAGMA journal_mode=WAL')
+
     # Create books table
     conn.execute('''
         CREATE TABLE IF NOT EXISTS books (
@@ -31,7 +98,7 @@ def init_database():
             available_copies INTEGER NOT NULL
         )
     ''')
-    
+
     # Create borrow_records table
     conn.execute('''
         CREATE TABLE IF NOT EXISTS borrow_records (
@@ -44,15 +111,43 @@ def init_database():
             FOREIGN KEY (book_id) REFERENCES books (id)
         )
     ''')
-    
+
+    # Unique index on ISBN backs duplicate detection at INSERT time and
+    # turns ISBN lookups into btree seeks
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_books_isbn ON books(isbn)')
+
+    # Catalog listing orders by title; a matching index lets SQLite walk the
+    # btree instead of sorting the whole table on every page load
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_title
+        ON books(title COLLATE NOCASE)
+    ''')
+
+    # Composite index backing the frequent per-patron active-loan queries
+    # (WHERE patron_id = ? AND return_date IS NULL)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_br_patron_active
+        ON borrow_records(patron_id, return_date)
+    ''')
+
+    # A patron may hold at most one active loan per book; the partial unique
+    # index enforces this at INSERT time so no pre-check SELECT is needed
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_active_borrow
+        ON borrow_records(patron_id, book_id) WHERE return_date IS NULL
+    ''')
+
     conn.commit()
     conn.close()
+    global _loan_state_version
+    _loan_state_version += 1
+    _borrow_count_cache.clear()
 
 def add_sample_data():
     """Add sample data to the database if it's empty."""
     conn = get_db_connection()
     book_count = conn.execute('SELECT COUNT(*) as count FROM books').fetchone()['count']
-    
+
     if book_count == 0:
         # Add sample books
         sample_books = [
@@ -60,142 +155,247 @@ def add_sample_data():
             ('To Kill a Mockingbird', 'Harper Lee', '9780061120084', 2),
             ('1984', 'George Orwell', '9780451524935', 1)
         ]
-        
+
         for title, author, isbn, copies in sample_books:
             conn.execute('''
                 INSERT INTO books (title, author, isbn, total_copies, available_copies)
                 VALUES (?, ?, ?, ?, ?)
             ''', (title, author, isbn, copies, copies))
-        
+
         # Make 1984 unavailable by adding a borrow record
         conn.execute('''
             INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
             VALUES (?, ?, ?, ?)
-        ''', ('123456', 3, 
+        ''', ('123456', 3,
               (datetime.now() - timedelta(days=5)).isoformat(),
               (datetime.now() + timedelta(days=9)).isoformat()))
-        
+
         # Update available copies for 1984
         conn.execute('UPDATE books SET available_copies = 0 WHERE id = 3')
-        
+
         conn.commit()
-    
+
     conn.close()
 
 # Helper Functions for Database Operations
 
 def get_all_books() -> List[Dict]:
     """Get all books from the database."""
-    conn = get_db_connection()
-    books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
-    conn.close()
+    conn = _cached_connection()
+    books = conn.execute('SELECT * FROM books ORDER BY title COLLATE NOCASE').fetchall()
     return [dict(book) for book in books]
 
+def get_all_titles() -> List[str]:
+    """Get all book titles in catalog display order."""
+    conn = _cached_connection()
+    rows = conn.execute('SELECT title FROM books ORDER BY title COLLATE NOCASE').fetchall()
+    return [row[0] for row in rows]
+
 def get_book_by_id(book_id: int) -> Optional[Dict]:
     """Get a specific book by ID."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
-    conn.close()
     return dict(book) if book else None
 
 def get_book_by_isbn(isbn: str) -> Optional[Dict]:
     """Get a specific book by ISBN."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
-    conn.close()
     return dict(book) if book else None
 
+def search_books(field: str, term: str) -> List[Dict]:
+    """Search books by partial, case-insensitive match on a single field."""
+    if field not in ('title', 'author'):
+        raise ValueError(f"Unsupported search field: {field}")
+    # Escape LIKE wildcards so they match literally in user-supplied terms
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    conn = _cached_connection()
+    books = conn.execute(f'''
+        SELECT * FROM books
+        WHERE {field} LIKE ? ESCAPE '\\' COLLATE NOCASE
+        ORDER BY title
+    ''', (f'%{escaped}%',)).fetchall()
+    return [dict(book) for book in books]
+
 def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     """Get currently borrowed books for a patron."""
-    conn = get_db_connection()
+    conn = _cached_connection()
+    # Stored timestamps are ISO-8601, so the overdue flag is a lexicographic
+    # comparison the engine can evaluate in C per row
     records = conn.execute('''
-        SELECT br.*, b.title, b.author 
-        FROM borrow_records br 
-        JOIN books b ON br.book_id = b.id 
+        SELECT br.*, b.title, b.author, (? > br.due_date) AS is_overdue
+        FROM borrow_records br
+        JOIN books b ON br.book_id = b.id
         WHERE br.patron_id = ? AND br.return_date IS NULL
         ORDER BY br.borrow_date
-    ''', (patron_id,)).fetchall()
-    conn.close()
-    
+    ''', (datetime.now().isoformat(), patron_id)).fetchall()
+
     borrowed_books = []
     for record in records:
         borrowed_books.append({
             'book_id': record['book_id'],
             'title': record['title'],
             'author': record['author'],
-            'borrow_date': datetime.fromisoformat(record['borrow_date']),
-            'due_date': datetime.fromisoformat(record['due_date']),
-            'is_overdue': datetime.now() > datetime.fromisoformat(record['due_date'])
+            'borrow_date': parse_iso_datetime(record['borrow_date']),
+            'due_date': parse_iso_datetime(record['due_date']),
+            'is_overdue': bool(record['is_overdue'])
         })
-    
+
     return borrowed_books
 
+def get_active_borrow(patron_id: str, book_id: int) -> Optional[Dict]:
+    """Get a patron's active (unreturned) borrow record for a specific book."""
+    conn = _cached_connection()
+    record = conn.execute('''
+        SELECT br.*, b.title, b.author, (? > br.due_date) AS is_overdue
+        FROM borrow_records br
+        JOIN books b ON br.book_id = b.id
+        WHERE br.patron_id = ? AND br.book_id = ? AND br.return_date IS NULL
+        LIMIT 1
+    ''', (datetime.now().isoformat(), patron_id, book_id)).fetchone()
+
+    if not record:
+        return None
+
+    return {
+        'book_id': record['book_id'],
+        'title': record['title'],
+        'author': record['author'],
+        'borrow_date': parse_iso_datetime(record['borrow_date']),
+        'due_date': parse_iso_datetime(record['due_date']),
+        'is_overdue': bool(record['is_overdue'])
+    }
+
+def get_patron_history(patron_id: str) -> List[Tuple]:
+    """Get a patron's full borrow history (past and present) joined with book info.
+
+    Returns plain tuples of (book_id, borrow_date, due_date, return_date,
+    title, author) ordered by borrow date, on the shared connection.
+    """
+    conn = _cached_connection()
+    cur = conn.cursor()
+    # Plain tuples let callers unpack positionally instead of paying a
+    # name-to-index lookup per field
+    cur.row_factory = None
+    return cur.execute('''
+        SELECT br.book_id, br.borrow_date, br.due_date, br.return_date,
+               b.title, b.author
+        FROM borrow_records br
+        JOIN books b ON br.book_id = b.id
+        WHERE br.patron_id = ?
+        ORDER BY br.borrow_date
+    ''', (patron_id,)).fetchall()
+
 def get_patron_borrow_count(patron_id: str) -> int:
     """Get the number of books currently borrowed by a patron."""
-    conn = get_db_connection()
+    cached = _borrow_count_cache.get(patron_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    conn = _cached_connection()
     count = conn.execute('''
-        SELECT COUNT(*) as count FROM borrow_records 
+        SELECT COUNT(*) as count FROM borrow_records
         WHERE patron_id = ? AND return_date IS NULL
     ''', (patron_id,)).fetchone()['count']
-    conn.close()
+    _borrow_count_cache[patron_id] = (count, time.monotonic() + _BORROW_COUNT_TTL)
     return count
 
 def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
     """Insert a new book into the database."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     try:
-        conn.execute('''
-            INSERT INTO books (title, author, isbn, total_copies, available_copies)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (title, author, isbn, total_copies, available_copies))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+                INSERT INTO books (title, author, isbn, total_copies, available_copies)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, author, isbn, total_copies, available_copies))
         return True
+    except sqlite3.IntegrityError:
+        # Let constraint violations (e.g. duplicate ISBN) propagate so the
+        # caller can distinguish them from generic database errors
+        raise
     except Exception as e:
-        conn.close()
         return False
 
 def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
     """Insert a new borrow record into the database."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     try:
-        conn.execute('''
-            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
-            VALUES (?, ?, ?, ?)
-        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+                INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+                VALUES (?, ?, ?, ?)
+            ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+        invalidate_patron_loans(patron_id)
+        return True
+    except Exception as e:
+        return False
+
+def atomic_borrow(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
+    """Insert a borrow record and decrement availability in one transaction.
+
+    A single commit halves the journaling cost of a borrow and ensures the
+    record and the availability count can never get out of sync.
+    """
+    conn = _cached_connection()
+    try:
+        with conn:
+            conn.execute('''
+                INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+                VALUES (?, ?, ?, ?)
+            ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+            conn.execute('''
+                UPDATE books SET available_copies = available_copies - 1 WHERE id = ?
+            ''', (book_id,))
+        invalidate_patron_loans(patron_id)
+        return True
+    except sqlite3.IntegrityError:
+        # Propagate so the caller can report a duplicate active borrow
+        raise
+    except Exception as e:
+        return False
+
+def atomic_return(patron_id: str, book_id: int, return_date: datetime) -> bool:
+    """Mark a borrow record returned and increment availability in one transaction."""
+    conn = _cached_connection()
+    try:
+        with conn:
+            conn.execute('''
+                UPDATE borrow_records
+                SET return_date = ?
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+            ''', (return_date.isoformat(), patron_id, book_id))
+            conn.execute('''
+                UPDATE books SET available_copies = available_copies + 1 WHERE id = ?
+            ''', (book_id,))
+        invalidate_patron_loans(patron_id)
         return True
     except Exception as e:
-        conn.close()
         return False
 
 def update_book_availability(book_id: int, change: int) -> bool:
     """Update the available copies of a book by a given amount (+1 for return, -1 for borrow)."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     try:
-        conn.execute('''
-            UPDATE books SET available_copies = available_copies + ? WHERE id = ?
-        ''', (change, book_id))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+                UPDATE books SET available_copies = available_copies + ? WHERE id = ?
+            ''', (change, book_id))
         return True
     except Exception as e:
-        conn.close()
         return False
 
 def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
     """Update the return date for a borrow record."""
-    conn = get_db_connection()
+    conn = _cached_connection()
     try:
-        conn.execute('''
-            UPDATE borrow_records 
-            SET return_date = ? 
-            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
-        ''', (return_date.isoformat(), patron_id, book_id))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+                UPDATE borrow_records
+                SET return_date = ?
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+            ''', (return_date.isoformat(), patron_id, book_id))
+        invalidate_patron_loans(patron_id)
         return True
     except Exception as e:
-        conn.close()
         return False
@@ -3,15 +3,47 @@ Library Service Module - Business Logic Functions
 Contains all the core business logic for the Library Management System
 """
 
+import re
+import sqlite3
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from database import (
     get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
-    insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books, get_patron_borrowed_books, get_db_connection
+    insert_book, search_books, parse_iso_datetime, get_active_borrow,
+    get_patron_history, atomic_borrow, atomic_return, loan_state_version
 )
 from services.payment_service import PaymentGateway
 
+# Precompiled validation patterns; a single C-level regex pass replaces
+# separate isdigit()/len() checks on every service call
+_PATRON_RE = re.compile(r'^\d{6}$')
+_ISBN_RE = re.compile(r'^\d{13}$')
+
+# Validation rules for add_book_to_catalog, checked in order; the first
+# failing predicate supplies the error message. Later rules may assume the
+# earlier ones passed (e.g. length checks run on non-empty values only).
+_ADD_BOOK_RULES = [
+    (lambda title, author, isbn, copies: bool(title),
+     "Title is required."),
+    (lambda title, author, isbn, copies: len(title) <= 200,
+     "Title must be less than 200 characters."),
+    (lambda title, author, isbn, copies: bool(author),
+     "Author is required."),
+    (lambda title, author, isbn, copies: len(author) <= 100,
+     "Author must be less than 100 characters."),
+    (lambda title, author, isbn, copies: bool(_ISBN_RE.match(isbn)),
+     "ISBN must be exactly 13 digits."),
+    (lambda title, author, isbn, copies: isinstance(copies, int) and copies > 0,
+     "Total copies must be a positive integer."),
+]
+
+def _late_fee_for_days(days_overdue: int) -> float:
+    """Tiered late fee: $0.50/day for the first 7 days, $1.00/day after,
+    capped at $15.00."""
+    days = max(0, days_overdue)
+    return min(min(days, 7) * 0.50 + max(days - 7, 0) * 1.00, 15.00)
+
 def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
     """
     Add a new book to the catalog.
@@ -26,34 +58,27 @@ def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -
     Returns:
         tuple: (success: bool, message: str)
     """
-    # Input validation
-    if not title or not title.strip():
-        return False, "Title is required."
-    
-    if len(title.strip()) > 200:
-        return False, "Title must be less than 200 characters."
-    
-    if not author or not author.strip():
-        return False, "Author is required."
-    
-    if len(author.strip()) > 100:
-        return False, "Author must be less than 100 characters."
-    
-    if len(isbn) != 13 or not isbn.isdigit():
-        return False, "ISBN must be exactly 13 digits."
-    
-    if not isinstance(total_copies, int) or total_copies <= 0:
-        return False, "Total copies must be a positive integer."
-    
-    # Check for duplicate ISBN
-    existing = get_book_by_isbn(isbn)
-    if existing:
-        return False, "A book with this ISBN already exists."
-    
-    # Insert new book
-    success = insert_book(title.strip(), author.strip(), isbn, total_copies, total_copies)
+    # Normalize once; every check and the insert reuse the stripped values
+    title = title.strip() if title else title
+    author = author.strip() if author else author
+
+    # Input validation: first failing rule wins
+    failure = next((message for predicate, message in _ADD_BOOK_RULES
+                    if not predicate(title, author, isbn, total_copies)), None)
+    if failure:
+        return False, failure
+
+
+    # Insert new book; the UNIQUE index on isbn catches duplicates in the
+    # same round trip instead of requiring a separate lookup
+    try:
+        success = insert_book(title, author, isbn, total_copies, total_copies)
+    except sqlite3.IntegrityError as e:
+        if 'isbn' in str(e):
+            return False, "A book with this ISBN already exists."
+        return False, "Database error occurred while adding the book."
     if success:
-        return True, f'Book "{title.strip()}" has been successfully added to the catalog.'
+        return True, f'Book "{title}" has been successfully added to the catalog.'
     else:
         return False, "Database error occurred while adding the book."
 
@@ -70,7 +95,7 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
         tuple: (success: bool, message: str)
     """
     # Validate patron ID
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+    if not patron_id or not _PATRON_RE.match(patron_id):
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
     # Check if book exists and is available
@@ -87,24 +112,18 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if current_borrowed >= 5:
         return False, "You have reached the maximum borrowing limit of 5 books."
     
-    # Check if patron already has this book borrowed
-    borrowed_books = get_patron_borrowed_books(patron_id)
-    if any(record['book_id'] == book_id for record in borrowed_books):
-        return False, "You have already borrowed this book."
-    
     # Create borrow record
     borrow_date = datetime.now()
     due_date = borrow_date + timedelta(days=14)
-    
-    # Insert borrow record and update availability
-    borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
-    if not borrow_success:
-        return False, "Database error occurred while creating borrow record."
-    
-    availability_success = update_book_availability(book_id, -1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
-    
+
+    # Insert borrow record and update availability in a single transaction;
+    # the partial unique index rejects a duplicate active borrow here
+    try:
+        if not atomic_borrow(patron_id, book_id, borrow_date, due_date):
+            return False, "Database error occurred while creating borrow record."
+    except sqlite3.IntegrityError:
+        return False, "You have already borrowed this book."
+
     return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
 
 def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
@@ -113,7 +132,7 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     
     """
     # Validate patron ID
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+    if not patron_id or not _PATRON_RE.match(patron_id):
         return False, "Invalid patron ID. Must be exactly 6 digits."
 
     # Check if book exists
@@ -122,19 +141,13 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
         return False, "Book not found."
 
     # Check if the book is currently borrowed by the patron
-    borrow_record = get_patron_borrowed_books(patron_id)
-    borrow_record = next((record for record in borrow_record if record['book_id'] == book_id), None)
+    borrow_record = get_active_borrow(patron_id, book_id)
     if not borrow_record:
         return False, "This book is not borrowed by the patron."
-    # update borrow record and update availability
-    delete_success = update_borrow_record_return_date(patron_id, book_id, datetime.now())
-    if not delete_success:
+    # Update borrow record and availability in a single transaction
+    if not atomic_return(patron_id, book_id, datetime.now()):
         return False, "Database error occurred while updating borrow record."
 
-    availability_success = update_book_availability(book_id, 1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
-
     return True, f'Successfully returned "{book["title"]}".'
 
 def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
@@ -143,7 +156,7 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
 
     """
     # Validate patron ID
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+    if not patron_id or not _PATRON_RE.match(patron_id):
         return {
             'fee_amount': 0.00,
             'days_overdue': 0,
@@ -160,8 +173,7 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
         }
 
     # Check if the book is currently borrowed by the patron
-    borrow_record = get_patron_borrowed_books(patron_id)
-    borrow_record = next((record for record in borrow_record if record['book_id'] == book_id), None)
+    borrow_record = get_active_borrow(patron_id, book_id)
     if not borrow_record:
         return {
             'fee_amount': 0.00,
@@ -173,13 +185,8 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
         # Calculate late fee with tiered rates
         days_overdue = (datetime.now() - borrow_record['due_date']).days
         days_overdue = max(0, days_overdue)
-        if days_overdue <= 7:
-            fee_amount = days_overdue * 0.50
-        else:
-            fee_amount = (7 * 0.50) + ((days_overdue - 7) * 1.00)
-        fee_amount = min(fee_amount, 15.00)
         return {
-            'fee_amount': fee_amount,
+            'fee_amount': _late_fee_for_days(days_overdue),
             'days_overdue': days_overdue,
             'status': 'overdue'
         }
@@ -218,17 +225,9 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
         book = get_book_by_isbn(search_term)
         return [book] if book else []
 
-    # Title/Author: partial, case-insensitive match
-    all_books = get_all_books()
-    term_lower = search_term.lower()
-    results: List[Dict] = []
-
-    for book in all_books:
-        value = (book.get(search_type) or "").lower()
-        if term_lower in value:
-            results.append(book)
-
-    return results
+    # Title/Author: partial, case-insensitive match pushed down into SQLite
+    # so only matching rows are materialized
+    return search_books(search_type, search_term)
 
 def get_patron_status_report(patron_id: str) -> Dict:
     """
@@ -241,63 +240,60 @@ def get_patron_status_report(patron_id: str) -> Dict:
     - borrowing_history: list of all borrow records (past and present) with dates and fees incurred
     """
     # Validate patron ID
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+    if not patron_id or not _PATRON_RE.match(patron_id):
         return {'error': 'Invalid patron ID. Must be exactly 6 digits.'}
 
-    # Currently borrowed books (uses database helper which returns datetime objects)
-    current_records = get_patron_borrowed_books(patron_id)
-    currently_borrowed = []
-    for rec in current_records:
-        currently_borrowed.append({
-            'book_id': rec['book_id'],
-            'title': rec['title'],
-            'author': rec['author'],
-            'due_date': rec['due_date'].strftime('%Y-%m-%d') if hasattr(rec['due_date'], 'strftime') else str(rec['due_date'])
-        })
+    return _status_report_core(patron_id, loan_state_version(),
+                               datetime.now().date())
 
-    books_borrowed_count = get_patron_borrow_count(patron_id)
+@lru_cache(maxsize=128)
+def _status_report_core(patron_id: str, version: int, today) -> Dict:
+    """
+    Build the status report body for a validated patron ID.
 
-    # Build borrowing history and compute total late fees
-    conn = get_db_connection()
-    rows = conn.execute('''
-        SELECT br.*, b.title, b.author
-        FROM borrow_records br
-        JOIN books b ON br.book_id = b.id
-        WHERE br.patron_id = ?
-        ORDER BY br.borrow_date
-    ''', (patron_id,)).fetchall()
-    conn.close()
+    Memoized per (patron, loan-state version, day): the version argument
+    changes on every borrow/return write so stale reports are never served,
+    and keying on today's date re-derives fees when an open loan accrues
+    another overdue day.
+    """
+    # Single round trip on the shared connection: the full history join
+    # carries everything needed to derive the currently-borrowed list and
+    # count as well
+    rows = get_patron_history(patron_id)
 
+    currently_borrowed = []
     borrowing_history = []
     total_late_fees = 0.0
     now = datetime.now()
 
-    for r in rows:
-        borrow_date = datetime.fromisoformat(r['borrow_date'])
-        due_date = datetime.fromisoformat(r['due_date'])
-        return_date = datetime.fromisoformat(r['return_date']) if r['return_date'] else None
+    for book_id, borrow_s, due_s, return_s, title, author in rows:
+        borrow_date = parse_iso_datetime(borrow_s)
+        due_date = parse_iso_datetime(due_s)
+        return_date = parse_iso_datetime(return_s) if return_s else None
+
+        if return_date is None:
+            currently_borrowed.append({
+                'book_id': book_id,
+                'title': title,
+                'author': author,
+                'due_date': due_date.strftime('%Y-%m-%d')
+            })
 
         # Determine the date to compare for overdue calculation
         compare_date = return_date if return_date else now
         days_overdue = max(0, (compare_date - due_date).days)
 
-        # Calculate fee using same tiered logic as calculate_late_fee_for_book
-        fee = 0.0
-        if days_overdue > 0:
-            if days_overdue <= 7:
-                fee = days_overdue * 0.50
-            else:
-                fee = (7 * 0.50) + ((days_overdue - 7) * 1.00)
-            fee = min(fee, 15.00)
+        # Same tiered fee schedule as calculate_late_fee_for_book
+        fee = _late_fee_for_days(days_overdue)
 
         # Only outstanding overdue fees are considered currently owed,
         # Since the system does not track payments, treat all computed fees as owed.
         total_late_fees += fee
 
         borrowing_history.append({
-            'book_id': r['book_id'],
-            'title': r['title'],
-            'author': r['author'],
+            'book_id': book_id,
+            'title': title,
+            'author': author,
             'borrow_date': borrow_date.strftime('%Y-%m-%d'),
             'due_date': due_date.strftime('%Y-%m-%d'),
             'return_date': return_date.strftime('%Y-%m-%d') if return_date else None,
@@ -309,7 +305,7 @@ def get_patron_status_report(patron_id: str) -> Dict:
     return {
         'currently_borrowed': currently_borrowed,
         'total_late_fees': total_late_fees,
-        'books_borrowed_count': books_borrowed_count,
+        'books_borrowed_count': len(currently_borrowed),
         'borrowing_history': borrowing_history
     }
 
@@ -335,7 +331,7 @@ def pay_late_fees(patron_id: str, book_id: int, payment_gateway: PaymentGateway
         success, msg, txn = pay_late_fees("123456", 1, mock_gateway)
     """
     # Validate patron ID
-    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+    if not patron_id or not _PATRON_RE.match(patron_id):
         return False, "Invalid patron ID. Must be exactly 6 digits.", None
     
     # Calculate late fee first
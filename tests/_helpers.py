@@ -0,0 +1,137 @@
+"""
+Shared helpers for test data setup.
+"""
+
+from datetime import datetime, timedelta
+
+import database
+
+
+# Snapshot of the shared connection's state taken right after the last clear;
+# if neither marker moved, no test has written since and the clear can be
+# skipped. PRAGMA data_version tracks commits by other connections,
+# total_changes tracks writes on the shared connection itself.
+_clean_marker = {'data_version': None, 'total_changes': None}
+
+
+def reset_database(conn):
+    """Delete all test data unless the database is already clean."""
+    data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+    if (_clean_marker['data_version'] == data_version
+            and _clean_marker['total_changes'] == conn.total_changes):
+        return
+    conn.executescript('DELETE FROM borrow_records; DELETE FROM books;')
+    _clean_marker['data_version'] = conn.execute('PRAGMA data_version').fetchone()[0]
+    _clean_marker['total_changes'] = conn.total_changes
+
+
+def bulk_add_books(rows):
+    """Insert many books in a single transaction and return their ids.
+
+    Each row is (title, author, isbn, total_copies); available_copies is set
+    equal to total_copies. Returns a dict mapping isbn -> generated book id
+    so callers do not need a follow-up SELECT to recover ids. One commit
+    replaces the per-book add_book_to_catalog calls fixtures otherwise pay
+    for.
+    """
+    conn = database._cached_connection()
+    ids = {}
+    with conn:
+        cur = conn.cursor()
+        for title, author, isbn, copies in rows:
+            cur.execute(
+                'INSERT INTO books (title, author, isbn, total_copies, available_copies) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (title, author, isbn, copies, copies)
+            )
+            ids[isbn] = cur.lastrowid
+    return ids
+
+
+def borrow_with_date(patron_id, book_id, days_ago):
+    """Create a borrow record dated days_ago days in the past.
+
+    Inserts the record with the back-dated borrow_date (due_date is 14 days
+    later) and decrements available_copies in one transaction, replacing the
+    borrow-then-UPDATE dance the overdue tests otherwise do.
+    """
+    borrow_date = datetime.now() - timedelta(days=days_ago)
+    due_date = borrow_date + timedelta(days=14)
+    conn = database._cached_connection()
+    with conn:
+        conn.execute(
+            'INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) '
+            'VALUES (?, ?, ?, ?)',
+            (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat())
+        )
+        conn.execute(
+            'UPDATE books SET available_copies = available_copies - 1 WHERE id = ?',
+            (book_id,)
+        )
+    # Keep loan-derived caches honest for service calls later in the test
+    database.invalidate_patron_loans(patron_id)
+
+
+def seed_mixed_history(patron_id):
+    """Seed one patron with a returned, an overdue, and a current loan.
+
+    Writes the final rows directly in one transaction instead of replaying
+    the borrow/return calls that would produce them: Book 1 was returned on
+    time, Book 2 is 10 days overdue, Book 3 is a current loan.
+    Returns {isbn: book_id} for the three seeded books.
+    """
+    now = datetime.now()
+    overdue_borrow = now - timedelta(days=24)
+    ids = bulk_add_books([
+        ("Book 1", "Author 1", "1234567890123", 1),
+        ("Book 2", "Author 2", "1234567890124", 1),
+        ("Book 3", "Author 3", "1234567890125", 1),
+    ])
+    records = [
+        (patron_id, ids["1234567890123"], now.isoformat(),
+         (now + timedelta(days=14)).isoformat(), now.isoformat()),
+        (patron_id, ids["1234567890124"], overdue_borrow.isoformat(),
+         (overdue_borrow + timedelta(days=14)).isoformat(), None),
+        (patron_id, ids["1234567890125"], now.isoformat(),
+         (now + timedelta(days=14)).isoformat(), None),
+    ]
+    conn = database._cached_connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO borrow_records '
+            '(patron_id, book_id, borrow_date, due_date, return_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            records
+        )
+        conn.execute(
+            'UPDATE books SET available_copies = 0 WHERE id IN (?, ?)',
+            (ids["1234567890124"], ids["1234567890125"])
+        )
+    database.invalidate_patron_loans(patron_id)
+    return ids
+
+
+def bulk_borrow(patron_id, book_ids):
+    """Record borrows for several books in a single transaction.
+
+    Equivalent end state to calling borrow_book_by_patron once per book, but
+    with one commit instead of one per borrow. Used where a test only needs
+    the borrows to exist, not the service-level checks.
+    """
+    now = datetime.now()
+    borrow_date = now.isoformat()
+    due_date = (now + timedelta(days=14)).isoformat()
+    conn = database._cached_connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) '
+            'VALUES (?, ?, ?, ?)',
+            [(patron_id, book_id, borrow_date, due_date) for book_id in book_ids]
+        )
+        placeholders = ','.join('?' * len(book_ids))
+        conn.execute(
+            f'UPDATE books SET available_copies = available_copies - 1 '
+            f'WHERE id IN ({placeholders})',
+            list(book_ids)
+        )
+    database.invalidate_patron_loans(patron_id)
@@ -1,17 +1,12 @@
 import pytest
-from database import get_all_books, init_database, get_db_connection
-from services.library_service import add_book_to_catalog
+from database import get_all_books
+from services.library_service import add_book_to_catalog, borrow_book_by_patron
+from tests._helpers import reset_database
 
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_get_all_books_empty():
     """Test getting all books when catalog is empty."""
@@ -42,7 +37,6 @@ def test_get_all_books_multiple():
 def test_get_all_books_with_borrowed():
     """Test getting all books when some are borrowed."""
     add_book_to_catalog("Test Book", "Test Author", "1234567890123", 2)
-    from services.library_service import borrow_book_by_patron
     book = get_all_books()[0]
     borrow_book_by_patron("123456", book['id'])
     books = get_all_books()
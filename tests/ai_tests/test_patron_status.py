@@ -1,18 +1,11 @@
 import pytest
-from datetime import datetime, timedelta
-from services.library_service import get_patron_status_report, add_book_to_catalog, borrow_book_by_patron, return_book_by_patron
-from database import init_database, get_db_connection, get_book_by_isbn
+from services.library_service import get_patron_status_report, borrow_book_by_patron, return_book_by_patron
+from tests._helpers import bulk_add_books, borrow_with_date, seed_mixed_history, reset_database
 
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_patron_status_no_history():
     """Test patron status for a patron with no borrowing history."""
@@ -34,12 +27,12 @@ def test_patron_status_invalid_patron_id():
 
 def test_patron_status_currently_borrowed():
     """Test patron status with currently borrowed books."""
-    add_book_to_catalog("Test Book 1", "Author 1", "1234567890123", 1)
-    add_book_to_catalog("Test Book 2", "Author 2", "1234567890124", 1)
-    book1 = get_book_by_isbn("1234567890123")
-    book2 = get_book_by_isbn("1234567890124")
-    borrow_book_by_patron("123456", book1['id'])
-    borrow_book_by_patron("123456", book2['id'])
+    ids = bulk_add_books([
+        ("Test Book 1", "Author 1", "1234567890123", 1),
+        ("Test Book 2", "Author 2", "1234567890124", 1),
+    ])
+    borrow_book_by_patron("123456", ids["1234567890123"])
+    borrow_book_by_patron("123456", ids["1234567890124"])
     result = get_patron_status_report("123456")
     assert len(result['currently_borrowed']) == 2
     assert result['books_borrowed_count'] == 2
@@ -48,10 +41,10 @@ def test_patron_status_currently_borrowed():
 
 def test_patron_status_with_returns():
     """Test patron status including returned books."""
-    add_book_to_catalog("Test Book", "Author", "1234567890123", 1)
-    book = get_book_by_isbn("1234567890123")
-    borrow_book_by_patron("123456", book['id'])
-    return_book_by_patron("123456", book['id'])
+    ids = bulk_add_books([("Test Book", "Author", "1234567890123", 1)])
+    book_id = ids["1234567890123"]
+    borrow_book_by_patron("123456", book_id)
+    return_book_by_patron("123456", book_id)
     result = get_patron_status_report("123456")
     assert result['currently_borrowed'] == []
     assert result['books_borrowed_count'] == 0
@@ -60,17 +53,9 @@ def test_patron_status_with_returns():
 
 def test_patron_status_with_overdue():
     """Test patron status with overdue books."""
-    add_book_to_catalog("Test Book", "Author", "1234567890123", 1)
-    book = get_book_by_isbn("1234567890123")
-    borrow_book_by_patron("123456", book['id'])
+    ids = bulk_add_books([("Test Book", "Author", "1234567890123", 1)])
     # Make it overdue by 5 days
-    borrow_date = datetime.now() - timedelta(days=19)
-    due_date = borrow_date + timedelta(days=14)
-    conn = get_db_connection()
-    conn.execute('UPDATE borrow_records SET borrow_date = ?, due_date = ? WHERE patron_id = ? AND book_id = ?',
-                 (borrow_date.isoformat(), due_date.isoformat(), "123456", book['id']))
-    conn.commit()
-    conn.close()
+    borrow_with_date("123456", ids["1234567890123"], 19)
     result = get_patron_status_report("123456")
     assert len(result['currently_borrowed']) == 1
     assert result['total_late_fees'] == 2.50  # 5 * 0.50
@@ -78,30 +63,8 @@ def test_patron_status_with_overdue():
 
 def test_patron_status_mixed_history():
     """Test patron status with mix of current, returned, and overdue books."""
-    add_book_to_catalog("Book 1", "Author 1", "1234567890123", 1)
-    add_book_to_catalog("Book 2", "Author 2", "1234567890124", 1)
-    add_book_to_catalog("Book 3", "Author 3", "1234567890125", 1)
-    book1 = get_book_by_isbn("1234567890123")
-    book2 = get_book_by_isbn("1234567890124")
-    book3 = get_book_by_isbn("1234567890125")
-    
-    # Borrow all three
-    borrow_book_by_patron("123456", book1['id'])
-    borrow_book_by_patron("123456", book2['id'])
-    borrow_book_by_patron("123456", book3['id'])
-    
-    # Return book1 on time
-    return_book_by_patron("123456", book1['id'])
-    
-    # Make book2 overdue by 10 days
-    borrow_date = datetime.now() - timedelta(days=24)
-    due_date = borrow_date + timedelta(days=14)
-    conn = get_db_connection()
-    conn.execute('UPDATE borrow_records SET borrow_date = ?, due_date = ? WHERE patron_id = ? AND book_id = ?',
-                 (borrow_date.isoformat(), due_date.isoformat(), "123456", book2['id']))
-    conn.commit()
-    conn.close()
-    
+    # Book 1 returned on time, Book 2 ten days overdue, Book 3 current
+    seed_mixed_history("123456")
     result = get_patron_status_report("123456")
     assert len(result['currently_borrowed']) == 2  # book2 and book3
     assert result['books_borrowed_count'] == 2
@@ -110,26 +73,17 @@ def test_patron_status_mixed_history():
 
 def test_patron_status_fee_calculation():
     """Test detailed fee calculation in patron status."""
-    add_book_to_catalog("Test Book", "Author", "1234567890123", 1)
-    book = get_book_by_isbn("1234567890123")
-    borrow_book_by_patron("123456", book['id'])
+    ids = bulk_add_books([("Test Book", "Author", "1234567890123", 1)])
     # Make it overdue by 20 days
-    borrow_date = datetime.now() - timedelta(days=34)
-    due_date = borrow_date + timedelta(days=14)
-    conn = get_db_connection()
-    conn.execute('UPDATE borrow_records SET borrow_date = ?, due_date = ? WHERE patron_id = ? AND book_id = ?',
-                 (borrow_date.isoformat(), due_date.isoformat(), "123456", book['id']))
-    conn.commit()
-    conn.close()
+    borrow_with_date("123456", ids["1234567890123"], 34)
     result = get_patron_status_report("123456")
     assert result['total_late_fees'] == 15.00  # Max fee
     assert result['borrowing_history'][0]['fee_incurred'] == 15.00
 
 def test_patron_status_data_format():
     """Test that the returned data is in the correct format."""
-    add_book_to_catalog("Test Book", "Author", "1234567890123", 1)
-    book = get_book_by_isbn("1234567890123")
-    borrow_book_by_patron("123456", book['id'])
+    ids = bulk_add_books([("Test Book", "Author", "1234567890123", 1)])
+    borrow_book_by_patron("123456", ids["1234567890123"])
     result = get_patron_status_report("123456")
     # Check currently_borrowed format
     for book in result['currently_borrowed']:
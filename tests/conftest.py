@@ -0,0 +1,58 @@
+"""
+Shared pytest configuration for the unit-test suites.
+
+Points the application at a shared in-memory SQLite database for the whole
+session so per-test setup and teardown never touch disk.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+import database
+from database import init_database
+
+# URI form with cache=shared lets every connection the app code opens see the
+# same in-memory database; the holder connection below keeps it alive for the
+# duration of the session. The name carries the pytest-xdist worker id so each
+# worker process gets an isolated database under `pytest -n auto`.
+_WORKER = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+_TEST_DATABASE = f'file:library_test_{_WORKER}?mode=memory&cache=shared'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def in_memory_database():
+    """Run the whole test session against a shared in-memory database."""
+    holder = sqlite3.connect(_TEST_DATABASE, uri=True)
+    original = database.DATABASE
+    database.DATABASE = _TEST_DATABASE
+    # Create the schema once for the whole session; per-test fixtures only
+    # clear data
+    init_database()
+    yield
+    database.DATABASE = original
+    holder.close()
+
+
+@pytest.fixture(scope='session')
+def db_conn(in_memory_database):
+    """One connection shared by fixtures and tests for the whole session.
+
+    Saves re-opening (and re-configuring) a connection in every per-test
+    fixture; callers execute and commit but never close it.
+    """
+    conn = database.get_db_connection()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_loan_caches():
+    """Invalidate loan-derived caches before each test.
+
+    The per-test DELETE cleanup writes through a raw connection, bypassing
+    the invalidation done by the service write helpers.
+    """
+    database._borrow_count_cache.clear()
+    database._loan_state_version += 1
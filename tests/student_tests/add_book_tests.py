@@ -2,33 +2,40 @@ import pytest
 from services.library_service import (
     add_book_to_catalog
 )
+from tests._helpers import reset_database
+
+# Fixture to ensure clean database for each test
+@pytest.fixture(autouse=True)
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_add_book_valid_input():
     """Test adding a book with valid input."""
     success, message = add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
     
-    assert success == True
+    assert success
     assert "successfully added" in message.lower()
 
 def test_add_book_invalid_copies_negative():
     """Test adding a book with negative number of copies."""
     success, message = add_book_to_catalog("Test Book", "Test Author", "1234567890123", -1)
     
-    assert success == False
+    assert not success
     assert "positive integer" in message.lower()
 
 def test_add_book_empty_isbn():
     """Test adding a book with empty ISBN."""
     success, message = add_book_to_catalog("Test Book", "Test Author", "", 5)
 
-    assert success == False
+    assert not success
     assert "13 digits" in message.lower()
 
 def test_add_book_zero_copies():
     """Test adding a book with zero copies."""
     success, message = add_book_to_catalog("Test Book", "Test Author", "1234567890123", 0)
     
-    assert success == False
+    assert not success
     assert "positive integer" in message.lower()
 
 def test_add_book_duplicate_isbn():
@@ -36,5 +43,5 @@ def test_add_book_duplicate_isbn():
     add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
     success, message = add_book_to_catalog("Another Book", "Another Author", "1234567890123", 3)
 
-    assert success == False
+    assert not success
     assert "already exists" in message.lower()
\ No newline at end of file
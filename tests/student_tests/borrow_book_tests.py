@@ -1,85 +1,70 @@
 import pytest
 from datetime import datetime, timedelta
 from services.library_service import (
-    borrow_book_by_patron, add_book_to_catalog
+    borrow_book_by_patron
 )
-from database import init_database, get_db_connection, get_book_by_isbn
+from tests._helpers import bulk_add_books, bulk_borrow, reset_database
 
 # Fixture to ensure clean database for each test
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_borrow_book_valid_patron_and_book():
     """Test borrowing a book with valid patron ID and available book."""
     # Add a book first
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
-    # get book id
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
-    success, message = borrow_book_by_patron("123456", book_id['id'])
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 5)])
+    success, message = borrow_book_by_patron("123456", ids["1234567890123"])
     
-    assert success == True
+    assert success
     assert "successfully borrowed" in message.lower()
     assert "due date:" in message.lower()
 
 def test_borrow_book_invalid_patron_id_too_short():
     """Test borrowing with patron ID too short."""
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
+    bulk_add_books([("Test Book", "Test Author", "1234567890123", 5)])
     
     success, message = borrow_book_by_patron("12345", 1)
     
-    assert success == False
+    assert not success
     assert "exactly 6 digits" in message
 
 def test_borrow_book_nonexistent_book():
     """Test borrowing a book that doesn't exist."""
     success, message = borrow_book_by_patron("123456", 999)
     
-    assert success == False
+    assert not success
     assert "book not found" in message.lower()
 
 def test_borrow_book_unavailable_book():
     """Test borrowing a book with no available copies."""
     # Add a book with 1 available copy
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 1)
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 1)])
+    book_id = ids["1234567890123"]
     # Borrow it first to make it unavailable
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
-    borrow_book_by_patron("123456", book_id['id'])
+    borrow_book_by_patron("123456", book_id)
     # Try to borrow again
-    success, message = borrow_book_by_patron("654321", book_id['id'])
+    success, message = borrow_book_by_patron("654321", book_id)
 
-    assert success == False
+    assert not success
     assert "not available" in message.lower()
 
 def test_borrow_book_patron_at_limit():
     """Test borrowing when patron has reached the 5-book limit."""
     # Add 6 books
-    for i in range(6):
-        isbn = f"123456789012{i}"
-        add_book_to_catalog(f"Test Book {i+1}", "Test Author", isbn, 1)
+    ids = bulk_add_books([
+        (f"Test Book {i+1}", "Test Author", f"123456789012{i}", 1)
+        for i in range(6)
+    ])
     
     patron_id = "123456"
     
-    # Borrow 5 books successfully
-    for i in range(5):
-        book_id = get_book_by_isbn(f"123456789012{i}")
-        assert book_id is not None, f"Book with ISBN 123456789012{i} not found in catalog"
-        success, message = borrow_book_by_patron(patron_id, book_id['id'])
-        assert success == True
+    # Put the patron at the 5-book limit in one transaction
+    bulk_borrow(patron_id, [ids[f"123456789012{i}"] for i in range(5)])
     
-    # Try to borrow the 6th book
-    book_id = get_book_by_isbn("1234567890125")
-    assert book_id is not None, "Book with ISBN 1234567890125 not found in catalog"
-    success, message = borrow_book_by_patron(patron_id, book_id['id'])
+    # Try to borrow the 6th book through the real service check
+    success, message = borrow_book_by_patron(patron_id, ids["1234567890125"])
 
-    assert success == False
+    assert not success
     assert "maximum borrowing limit" in message.lower()
\ No newline at end of file
@@ -1,18 +1,13 @@
 import pytest
 from services.library_service import add_book_to_catalog
-from database import init_database, get_db_connection, get_all_books, get_book_by_isbn
+from database import get_all_books, get_all_titles
+from tests._helpers import bulk_add_books, reset_database
 
 # Fixture to ensure clean database for each test
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_catalog_display_empty_catalog():
     """Test displaying catalog when no books exist."""
@@ -59,28 +54,21 @@ def test_catalog_display_multiple_books():
 
 def test_catalog_display_books_sorted_by_title():
     """Test that books in catalog are sorted alphabetically by title."""
-    add_book_to_catalog("Zebra Book", "Author 1", "1234567890123", 1)
-    add_book_to_catalog("Apple Book", "Author 2", "1234567890124", 1)
-    add_book_to_catalog("Book Middle", "Author 3", "1234567890125", 1)
+    bulk_add_books([
+        ("Zebra Book", "Author 1", "1234567890123", 1),
+        ("Apple Book", "Author 2", "1234567890124", 1),
+        ("Book Middle", "Author 3", "1234567890125", 1),
+    ])
     
-    books = get_all_books()
-    
-    assert len(books) == 3
-    # Books should be sorted by title
-    assert books[0]['title'] == "Apple Book"
-    assert books[1]['title'] == "Book Middle"
-    assert books[2]['title'] == "Zebra Book"
+    # Titles come back in catalog display order without materializing rows
+    assert get_all_titles() == ["Apple Book", "Book Middle", "Zebra Book"]
 
-def test_catalog_display_book_with_zero_available_copies():
+def test_catalog_display_book_with_zero_available_copies(db_conn):
     """Test displaying a book with zero available copies."""
-    add_book_to_catalog("Popular Book", "Famous Author", "1234567890123", 1)
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
+    ids = bulk_add_books([("Popular Book", "Famous Author", "1234567890123", 1)])
     # Simulate borrowing by updating available copies
-    conn = get_db_connection()
-    conn.execute('UPDATE books SET available_copies = 0 WHERE id = ?', (book_id['id'],))
-    conn.commit()
-    conn.close()
+    with db_conn:
+        db_conn.execute('UPDATE books SET available_copies = 0 WHERE id = ?', (ids["1234567890123"],))
     
     books = get_all_books()
     book = books[0]
@@ -1,120 +1,84 @@
 import pytest
-from datetime import datetime, timedelta
 from services.library_service import (
-    get_patron_status_report, borrow_book_by_patron, return_book_by_patron, add_book_to_catalog, get_book_by_isbn
+    get_patron_status_report, borrow_book_by_patron, return_book_by_patron
 )
-from database import init_database, get_db_connection
+from tests._helpers import bulk_add_books, reset_database
+
+EXPECTED_FIELDS = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
+
+
+@pytest.fixture(scope="module")
+def seeded_books(db_conn):
+    """Seed the catalog once for the module; tests only vary borrow state."""
+    reset_database(db_conn)
+    return bulk_add_books([
+        ("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3),
+        ("To Kill a Mockingbird", "Harper Lee", "9780061120084", 2),
+        ("1984", "George Orwell", "9780451524935", 1),
+        ("Animal Farm", "George Orwell", "9780451526342", 2),
+    ])
+
 
-# Fixture to ensure clean database for each test
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
-
-def setup_sample_books():
-    """Helper function to set up sample books for testing."""
-    add_book_to_catalog("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3)
-    add_book_to_catalog("To Kill a Mockingbird", "Harper Lee", "9780061120084", 2)
-    add_book_to_catalog("1984", "George Orwell", "9780451524935", 1)
-    add_book_to_catalog("Animal Farm", "George Orwell", "9780451526342", 2)
-
-def test_patron_status_valid_patron_id():
+def clean_borrow_state(db_conn, seeded_books):
+    """Reset borrow records and availability between tests, keeping the catalog."""
+    db_conn.executescript(
+        'DELETE FROM borrow_records; '
+        'UPDATE books SET available_copies = total_copies;'
+    )
+
+
+def test_patron_status_valid_patron_id(seeded_books):
     """Test getting patron status with valid patron ID."""
-    setup_sample_books()
-    
     result = get_patron_status_report("123456")
-    
+
     assert isinstance(result, dict)
     # Should have the required fields for patron status
-    expected_fields = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
-    for field in expected_fields:
+    for field in EXPECTED_FIELDS:
         assert field in result
 
-def test_patron_status_patron_with_no_borrowing_history():
-    """Test patron status for patron with no borrowing history."""
-    setup_sample_books()
-    
-    result = get_patron_status_report("123456")
-    
-    # Check all expected fields exist and their values are 0 or empty
-    expected_fields = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
-    for field in expected_fields:
-        assert field in result
 
-    assert result['books_borrowed_count'] == 0
-    assert result['total_late_fees'] == 0.00
-    assert isinstance(result['currently_borrowed'], list) and len(result['currently_borrowed']) == 0
-    assert isinstance(result['borrowing_history'], list) and len(result['borrowing_history']) == 0
-
-def test_patron_status_patron_with_currently_borrowed_books():
-    """Test patron status for patron with currently borrowed books."""
-    setup_sample_books()
-    # Borrow some books
-    book1 = get_book_by_isbn("9780743273565")
-    assert book1 is not None, "Book with ISBN 9780743273565 not found in catalog"
-    borrow_book_by_patron("123456", book1['id'])
-    book2 = get_book_by_isbn("9780061120084")
-    assert book2 is not None, "Book with ISBN 9780061120084 not found in catalog"
-    borrow_book_by_patron("123456", book2['id'])
+@pytest.mark.parametrize("borrow_isbns,return_isbns,expected_current,expected_history", [
+    # No borrowing history
+    ([], [], 0, 0),
+    # Currently borrowed books
+    (["9780743273565", "9780061120084"], [], 2, 2),
+    # Borrowed and returned
+    (["9780743273565"], ["9780743273565"], 0, 1),
+])
+def test_patron_status_borrowing_scenarios(seeded_books, borrow_isbns, return_isbns,
+                                           expected_current, expected_history):
+    """Test patron status across no-history, borrowed, and returned scenarios."""
+    for isbn in borrow_isbns:
+        borrow_book_by_patron("123456", seeded_books[isbn])
+    for isbn in return_isbns:
+        return_book_by_patron("123456", seeded_books[isbn])
 
     result = get_patron_status_report("123456")
 
-    expected_fields = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
-    for field in expected_fields:
+    for field in EXPECTED_FIELDS:
         assert field in result
-    
-    assert isinstance(result, dict)
-    assert result['books_borrowed_count'] == 2
-    assert len(result['currently_borrowed']) == 2
-    # Each borrowed book should have title, author, due_date
-    for book in result['currently_borrowed']:
-            assert 'title' in book
-            assert 'author' in book
-            assert 'due_date' in book
-
-def test_patron_status_patron_with_returned_books():
-    """Test patron status for patron who has returned books."""
-    setup_sample_books()
-    book_id = get_book_by_isbn("9780743273565")
-    assert book_id is not None, "Book with ISBN 9780743273565 not found in catalog"
-    # Borrow and return a book
-    borrow_book_by_patron("123456", book_id['id'])
-    return_book_by_patron("123456", book_id['id'])
 
-    result = get_patron_status_report("123456")
-    
-    expected_fields = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
-    for field in expected_fields:
-        assert field in result
+    assert result['books_borrowed_count'] == expected_current
+    assert len(result['currently_borrowed']) == expected_current
+    assert len(result['borrowing_history']) == expected_history
+    # Each currently borrowed book should have title, author, due_date
+    for book in result['currently_borrowed']:
+        assert 'title' in book
+        assert 'author' in book
+        assert 'due_date' in book
 
-    assert isinstance(result, dict)
-    assert result['books_borrowed_count'] == 0  
-    assert isinstance(result['borrowing_history'], list)
-    assert len(result['borrowing_history']) == 1
 
-def test_patron_status_patron_with_late_fees():
+def test_patron_status_patron_with_late_fees(seeded_books):
     """Test patron status for patron with late fees."""
-    setup_sample_books()
-
-    book_id_1 = get_book_by_isbn("9780743273565")
-    assert book_id_1 is not None, "Book with ISBN 9780743273565 not found in catalog"
-    book_id_2 = get_book_by_isbn("9780061120084")
-    assert book_id_2 is not None, "Book with ISBN 9780061120084 not found in catalog"
-    borrow_book_by_patron("123456", book_id_1['id'])
-    borrow_book_by_patron("123456", book_id_2['id'])
+    borrow_book_by_patron("123456", seeded_books["9780743273565"])
+    borrow_book_by_patron("123456", seeded_books["9780061120084"])
 
     result = get_patron_status_report("123456")
 
-    expected_fields = ['currently_borrowed', 'total_late_fees', 'books_borrowed_count', 'borrowing_history']
-    for field in expected_fields:
+    for field in EXPECTED_FIELDS:
         assert field in result
-    
+
     assert isinstance(result, dict)
     assert isinstance(result['total_late_fees'], (int, float))
     assert result['total_late_fees'] >= 0.00
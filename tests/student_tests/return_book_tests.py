@@ -1,85 +1,68 @@
 import pytest
-from datetime import datetime, timedelta
 from services.library_service import (
-    return_book_by_patron, borrow_book_by_patron, add_book_to_catalog
+    return_book_by_patron, borrow_book_by_patron
 )
-from database import init_database, get_db_connection, get_book_by_isbn
+from tests._helpers import bulk_add_books, borrow_with_date, reset_database
 
 # Fixture to ensure clean database for each test
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def test_return_book_valid_patron_and_book():
     """Test returning a book with valid patron ID and borrowed book."""
     # Add a book and borrow it first
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
-    borrow_book_by_patron("123456", book_id['id'])
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 5)])
+    book_id = ids["1234567890123"]
+    borrow_book_by_patron("123456", book_id)
 
-    success, message = return_book_by_patron("123456", book_id['id'])
+    success, message = return_book_by_patron("123456", book_id)
 
-    assert success == True
+    assert success
     assert "successfully returned" in message.lower()
 
 def test_return_book_nonexistent_book():
     """Test returning a book that doesn't exist."""
     success, message = return_book_by_patron("123456", 999)
     
-    assert success == False
+    assert not success
     assert "book not found" in message.lower()
 
 def test_return_book_not_borrowed_by_patron():
     """Test returning a book that wasn't borrowed by the patron."""
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 5)])
+    book_id = ids["1234567890123"]
     # Borrow with different patron
-    borrow_book_by_patron("654321", book_id['id'])
+    borrow_book_by_patron("654321", book_id)
 
     # Try to return with different patron
-    success, message = return_book_by_patron("123456", book_id['id'])
+    success, message = return_book_by_patron("123456", book_id)
 
-    assert success == False
+    assert not success
     assert "not borrowed by the patron" in message.lower()
 
 def test_return_book_already_returned():
     """Test returning a book that has already been returned."""
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 1)
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
-    borrow_book_by_patron("123456", book_id['id'])
-    return_book_by_patron("123456", book_id['id'])  # First return
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 1)])
+    book_id = ids["1234567890123"]
+    borrow_book_by_patron("123456", book_id)
+    return_book_by_patron("123456", book_id)  # First return
 
     # Try to return again
-    success, message = return_book_by_patron("123456", book_id['id'])
+    success, message = return_book_by_patron("123456", book_id)
 
-    assert success == False
+    assert not success
     assert "not borrowed by the patron" in message.lower()
 
 def test_return_book_with_late_fee():
     """Test returning an overdue book with late fees."""
-    add_book_to_catalog("Test Book", "Test Author", "1234567890123", 5)
-    book_id = get_book_by_isbn("1234567890123")
-    assert book_id is not None, "Book with ISBN 1234567890123 not found in catalog"
-    borrow_book_by_patron("123456", book_id['id'])
+    ids = bulk_add_books([("Test Book", "Test Author", "1234567890123", 5)])
+    book_id = ids["1234567890123"]
+    # Borrowed 20 days ago, so the 14-day loan period has lapsed
+    borrow_with_date("123456", book_id, 20)
 
-    # Manipulate the borrow date to be > 14 days ago
-    conn = get_db_connection()
-    overdue_date = (datetime.now() - timedelta(days=20)).strftime('%Y-%m-%d')
-    conn.execute("UPDATE borrow_records SET borrow_date = ? WHERE patron_id = ? AND book_id = ?",
-                 (overdue_date, "123456", book_id['id']))
-    conn.commit()
-    conn.close()
-    success, message = return_book_by_patron("123456", book_id['id'])
+    success, message = return_book_by_patron("123456", book_id)
 
-    assert success == True
+    assert success
     assert "successfully returned" in message.lower()
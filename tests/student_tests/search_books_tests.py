@@ -1,28 +1,24 @@
 import pytest
 from services.library_service import (
-    search_books_in_catalog, add_book_to_catalog
+    search_books_in_catalog
 )
-from database import init_database, get_db_connection
+from tests._helpers import bulk_add_books, reset_database
 
 # Fixture to ensure clean database for each test
 @pytest.fixture(autouse=True)
-def setup_database():
-    """Initialize database before each test."""
-    init_database()
-    # Clear existing data
-    conn = get_db_connection()
-    conn.execute('DELETE FROM borrow_records')
-    conn.execute('DELETE FROM books')
-    conn.commit()
-    conn.close()
+def setup_database(db_conn):
+    """Reset database state before each test (skipped when nothing was written)."""
+    reset_database(db_conn)
 
 def setup_sample_books():
-    """Helper function to set up sample books for testing."""
-    add_book_to_catalog("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3)
-    add_book_to_catalog("To Kill a Mockingbird", "Harper Lee", "9780061120084", 2)
-    add_book_to_catalog("1984", "George Orwell", "9780451524935", 1)
-    add_book_to_catalog("Animal Farm", "George Orwell", "9780451526342", 2)
-    add_book_to_catalog("The Catcher in the Rye", "J.D. Salinger", "9780316769174", 1)
+    """Helper function to set up sample books in one transaction."""
+    bulk_add_books([
+        ("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3),
+        ("To Kill a Mockingbird", "Harper Lee", "9780061120084", 2),
+        ("1984", "George Orwell", "9780451524935", 1),
+        ("Animal Farm", "George Orwell", "9780451526342", 2),
+        ("The Catcher in the Rye", "J.D. Salinger", "9780316769174", 1),
+    ])
 
 def test_search_books_by_title_exact_match():
     """Test searching for books by exact title match."""
@@ -55,7 +51,7 @@ def test_search_books_by_title_multiple_results():
     """Test searching for books by title returning multiple results."""
     setup_sample_books()
     # Add more books with "The" in title
-    add_book_to_catalog("The Hobbit", "J.R.R. Tolkien", "9780547928227", 2)
+    bulk_add_books([("The Hobbit", "J.R.R. Tolkien", "9780547928227", 2)])
     
     results = search_books_in_catalog("The", "title")
     
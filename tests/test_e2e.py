@@ -1,70 +1,86 @@
+import threading
+
 import pytest
 from playwright.sync_api import Page, expect
-import subprocess
-import time
-import signal
-import sys
-import os
-import socket
-import requests
-from contextlib import closing
-
-flask_process = None
+from werkzeug.serving import make_server
 
+from app import create_app
 
-def is_port_in_use(port):
-    """Check if a port is already in use."""
-    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
-        return sock.connect_ex(('127.0.0.1', port)) == 0
+# Failure-mode budget: the server is local and in-process, so anything
+# slower than this is already broken and should fail fast rather than
+# sit out Playwright's 30s defaults
+NAVIGATION_TIMEOUT_MS = 5_000
+ACTION_TIMEOUT_MS = 3_000
 
 
-@pytest.fixture(scope="module", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def flask_server():
     """
-    Start the Flask server before running E2E tests and stop it after.
-    Includes proper server readiness check for CI.
+    Serve the Flask app in-process for the E2E tests; yields its base URL.
+
+    make_server binds the listening socket before returning, so the app is
+    reachable as soon as the serving thread starts: no interpreter spawn,
+    no readiness polling, and teardown is a plain shutdown() instead of
+    signalling a child process. Binding port 0 lets the OS pick a free
+    port, so each pytest-xdist worker runs its own server (against its own
+    per-worker in-memory database) and the tests parallelize without any
+    cross-worker locking.
     """
-    global flask_process
-    
-    # Check if port is already in use
-    if is_port_in_use(5000):
-        print("\nPort 5000 is already in use. Using existing server.")
-        yield
-        return
-
-    print("\nStarting Flask server for E2E tests...")
-    
-    # Start Flask server with explicit host binding
-    flask_process = subprocess.Popen(
-        [sys.executable, "app.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        env={**os.environ, "FLASK_ENV": "testing"}
-    )
-    
-    # Wait for the server to be ready
-    time.sleep(30) 
-    yield
-    
-    # Stop the Flask server after tests complete
-    print("\nStopping Flask server...")
-    if flask_process and flask_process.poll() is None:
-        flask_process.send_signal(signal.SIGTERM)
-        try:
-            flask_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            flask_process.kill()
-            flask_process.wait()
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def e2e_context(browser):
+    """One browser context shared by the whole session.
+
+    pytest-playwright's default page fixture builds a fresh context per
+    test; reusing one (with cookies cleared between tests) drops that
+    per-test startup cost. Video and tracing stay off.
+    """
+    context = browser.new_context()
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    context.set_default_timeout(ACTION_TIMEOUT_MS)
+    yield context
+    context.close()
+
+
+@pytest.fixture
+def page(e2e_context):
+    """Per-test page on the shared context, overriding the plugin fixture."""
+    page = e2e_context.new_page()
+    yield page
+    page.close()
+    e2e_context.clear_cookies()
+
+
+@pytest.fixture(scope="module")
+def catalog_page(browser, flask_server):
+    """A catalog page shared by the read-only tests.
+
+    Loading /catalog once and reusing the page skips a server round-trip
+    and render per test; tests that mutate state keep their own page.
+    """
+    context = browser.new_context()
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    context.set_default_timeout(ACTION_TIMEOUT_MS)
+    page = context.new_page()
+    page.goto(f"{flask_server}/catalog")
+    yield page
+    context.close()
 
 
-def test_homepage_title(page: Page) -> None:
+def test_homepage_title(page: Page, flask_server) -> None:
     """Test that the homepage loads with the correct title."""
-    page.goto("http://127.0.0.1:5000")
+    page.goto(flask_server)
     expect(page).to_have_title("Library Management System")
 
 
-def test_borrow_book_user_flow(page: Page) -> None:
+def test_borrow_book_user_flow(page: Page, flask_server) -> None:
     """
     E2E test for borrowing a book.
     
@@ -78,70 +94,65 @@ def test_borrow_book_user_flow(page: Page) -> None:
     7. Verify book availability count decreases
     """
     # Step 1: Navigate to the catalog page
-    page.goto("http://127.0.0.1:5000/catalog")
+    page.goto(f"{flask_server}/catalog")
     
     # Step 2: Verify the catalog page loaded with correct heading
     expect(page.locator("h2")).to_contain_text("Book Catalog")
     
-    # Step 3: Verify that books are displayed in the table
+    # Step 3: Verify that books are displayed in the table (header details
+    # are covered by test_catalog_displays_book_information)
     book_table = page.locator("table")
     expect(book_table).to_be_visible()
     
-    # Verify table headers are present
-    expect(page.locator("th:has-text('Title')")).to_be_visible()
-    expect(page.locator("th:has-text('Author')")).to_be_visible()
-    expect(page.locator("th:has-text('Availability')")).to_be_visible()
-    expect(page.locator("th:has-text('Actions')")).to_be_visible()
-    
     # Step 4: Find the first available book (with available copies > 0)
     first_available_book_row = page.locator("tr:has(.status-available)").first
     expect(first_available_book_row).to_be_visible()
     
-    # Get the book title for verification
-    book_title = first_available_book_row.locator("td").nth(1).inner_text()
-    print(f"\nAttempting to borrow: {book_title}")
-    
-    # Get the initial availability text
-    initial_availability = first_available_book_row.locator(".status-available").inner_text()
-    print(f"Initial availability: {initial_availability}")
+    # Read everything the assertions below need from the row in one
+    # evaluate call: each separate expect()/inner_text() would round-trip
+    # to the browser on its own
+    book_title, initial_availability, placeholder, button_class = (
+        first_available_book_row.evaluate(
+            "r => [r.querySelectorAll('td')[1].innerText,"
+            " r.querySelector('.status-available').innerText,"
+            " r.querySelector(\"input[name='patron_id']\").placeholder,"
+            " r.querySelector('button').className]"
+        )
+    )
+    assert initial_availability
+    assert placeholder == "Patron ID (6 digits)"
+    assert button_class == "btn btn-success"
 
-    # Step 5: Fill in the patron ID in the borrow form
+    # Step 5: Fill in the patron ID in the borrow form; fill() itself waits
+    # for the input to be visible and editable
     patron_id_input = first_available_book_row.locator("input[name='patron_id']")
-    expect(patron_id_input).to_be_visible()
-    expect(patron_id_input).to_have_attribute("placeholder", "Patron ID (6 digits)")
-    
-    # Enter a valid 6-digit patron ID
     patron_id_input.fill("123456")
-    
-    # Step 6: Verify the borrow button is present and click it
+
+    # Step 6: Click the borrow button; click() waits for actionability, so
+    # a separate visibility expect would be a redundant round-trip
     borrow_button = first_available_book_row.locator("button:has-text('Borrow')")
-    expect(borrow_button).to_be_visible()
-    expect(borrow_button).to_have_class("btn btn-success")
-    
-    # Click the borrow button
     borrow_button.click()
     
-    # Step 7: Wait for the page to reload and verify success message
-    page.wait_for_load_state("networkidle")
+    # Step 7: Wait for the post-submit redirect back to the catalog; the
+    # expect() below then waits on the row itself, with no network-idle delay
+    page.wait_for_url("**/catalog", wait_until="domcontentloaded")
     
     # Step 8: Verify that the book's availability has changed
     updated_book_row = page.locator(f"tr:has-text('{book_title}')").first
     expect(updated_book_row).to_be_visible()
-    
-    print(f"Successfully borrowed: {book_title}")
 
 
-def test_borrow_book_invalid_patron_id(page: Page) -> None:
+def test_borrow_book_invalid_patron_id(catalog_page: Page, flask_server) -> None:
     """
     E2E test for attempting to borrow with invalid patron ID.
     
     User Flow:
-    1. Navigate to catalog
+    1. Reuse the shared catalog page
     2. Find an available book
     3. Try to submit with empty or invalid patron ID
     4. Verify HTML5 validation prevents submission
     """
-    page.goto("http://127.0.0.1:5000/catalog")
+    page = catalog_page
     
     # Find the first available book
     first_available_book_row = page.locator("tr:has(.status-available)").first
@@ -163,12 +174,10 @@ def test_borrow_book_invalid_patron_id(page: Page) -> None:
     borrow_button.click()
     
     # Verify we're still on the same page
-    expect(page).to_have_url("http://127.0.0.1:5000/catalog")
-    
-    print("HTML5 validation correctly prevents invalid patron ID submission")
+    expect(page).to_have_url(f"{flask_server}/catalog")
 
 
-def test_navigate_to_catalog_from_home(page: Page) -> None:
+def test_navigate_to_catalog_from_home(page: Page, flask_server) -> None:
     """
     E2E test for navigation flow from home to catalog.
     
@@ -178,40 +187,35 @@ def test_navigate_to_catalog_from_home(page: Page) -> None:
     3. Verify catalog page loads
     """
     # Start at homepage
-    page.goto("http://127.0.0.1:5000")
-    
-    # Look for a link to the catalog
-    catalog_link = page.locator("a[href*='catalog'], a:has-text('Catalog'), a:has-text('Browse')")
-    
-    if catalog_link.count() > 0:
-        catalog_link.first.click()
-        
-        # Verify we're on the catalog page
-        expect(page).to_have_url("http://127.0.0.1:5000/catalog")
-        expect(page.locator("h2")).to_contain_text("Book Catalog")
-        
-        print("Successfully navigated from home to catalog")
-    else:
-        print("No catalog link found on homepage - skipping navigation test")
+    page.goto(flask_server)
 
+    # The nav in base.html always renders the catalog link, so a plain
+    # attribute selector finds it without the text-walking :has-text
+    # fallbacks or a count() pre-check
+    page.locator("a[href='/catalog']").click()
 
-def test_catalog_displays_book_information(page: Page) -> None:
+    # Verify we're on the catalog page
+    expect(page).to_have_url(f"{flask_server}/catalog")
+    expect(page.locator("h2")).to_contain_text("Book Catalog")
+
+
+def test_catalog_displays_book_information(catalog_page: Page) -> None:
     """
     E2E test verifying all book information is displayed correctly.
     
     User Flow:
-    1. Navigate to catalog
+    1. Reuse the shared catalog page
     2. Verify all expected columns are present
     3. Verify at least one book is displayed with complete information
     """
-    page.goto("http://127.0.0.1:5000/catalog")
+    page = catalog_page
     
-    # Verify all table headers are present
+    # Verify all table headers are present; one batched evaluation reads
+    # every header text in a single browser round-trip
     headers = ["ID", "Title", "Author", "ISBN", "Availability", "Actions"]
+    header_texts = page.locator("th").evaluate_all("ns => ns.map(n => n.innerText)")
     for header in headers:
-        header_locator = page.locator(f"th:has-text('{header}')")
-        expect(header_locator).to_be_visible()
-        print(f"Found header: {header}")
+        assert header in header_texts, f"Missing header: {header}"
     
     # Verify at least one book row exists
     book_rows = page.locator("tbody tr")
@@ -224,9 +228,7 @@ def test_catalog_displays_book_information(page: Page) -> None:
     cells = first_book.locator("td")
     expect(cells).to_have_count(6)
     
-    # Verify each cell has content
-    for i in range(6):
-        cell_text = cells.nth(i).inner_text()
-        print(f"  Column {i}: {cell_text[:50]}...")  # Print first 50 chars
-    
-    print("Catalog displays all book information correctly")
\ No newline at end of file
+    # Read all cell texts in one round-trip instead of one per cell, and
+    # require each data column to be populated
+    cell_texts = cells.evaluate_all("ns => ns.map(n => n.innerText)")
+    assert all(text.strip() for text in cell_texts[:5])
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Regression tests for the indexes init_database() is expected to create.
+
+Every borrow/return/status operation filters borrow_records by patron_id
+(usually together with return_date), and ISBN duplicate detection relies on
+the unique index on books.isbn, so losing any of these silently turns the
+hot queries back into table scans.
+"""
+
+def _index_names(conn, table):
+    rows = conn.execute(f"PRAGMA index_list('{table}')").fetchall()
+    return {row['name'] for row in rows}
+
+
+def test_books_isbn_unique_index_exists(db_conn):
+    """books.isbn must keep its unique index (lookup + duplicate rejection)."""
+    assert 'idx_books_isbn' in _index_names(db_conn, 'books')
+
+
+def test_books_title_index_exists(db_conn):
+    """books.title must keep the index backing the catalog's ORDER BY."""
+    assert 'idx_books_title' in _index_names(db_conn, 'books')
+
+
+def test_borrow_records_patron_indexes_exist(db_conn):
+    """borrow_records must keep the patron/active-loan indexes."""
+    names = _index_names(db_conn, 'borrow_records')
+    assert 'idx_br_patron_active' in names
+    assert 'idx_unique_active_borrow' in names